@@ -7,7 +7,7 @@ from .config import Config
 from .variant_processing.vcf_parser import process_variants
 from .variant_processing.fasta_generator import generate_fasta_sequences
 from .alignment.muscle_wrapper import run_alignments
-from .kmer.window_generator import process_fasta_files, save_kmer_results_to_csv, process_chromosome_groups, process_and_merge_results, read_fasta_files , parse_fasta_with_metadata
+from .kmer.window_generator import process_fasta_files, process_chromosome_groups, process_and_merge_results, read_fasta_files , parse_fasta_with_metadata, run_kmer_pipeline, read_kmer_results
 from .kmer.comparison import process_comparison_results
 from .genotype.genotype_mapper import convert_to_plink_with_variants, create_ped_and_map_files, create_vcf_file
 from .utils.logging_utils import get_logger
@@ -24,6 +24,38 @@ def check_tools(*tools):
             f"Please ensure they are installed and accessible from your PATH."
         )
 
+def run_kmer_stage(alignments_dir: str, genome_metadata: dict, window_size: int, threads: int,
+                   out: str, emit_intermediates: bool = False) -> pd.DataFrame:
+    """
+    Compare and merge k-mer windows in memory and return the final results.
+    With emit_intermediates, the comparison results before and after
+    post-processing are also written to `out` as Parquet; the comparison rows
+    are streamed to disk as files complete and read back for the later steps.
+    """
+    if not emit_intermediates:
+        return run_kmer_pipeline(
+            alignments_dir,
+            genome_metadata=genome_metadata,
+            k=window_size,
+            max_workers=threads
+        )
+
+    intermediate_file = os.path.join(out, "comparison_results.parquet")
+    processed_file = os.path.join(out, "processed_comparison_results.parquet")
+
+    process_fasta_files(
+        alignments_dir,
+        genome_metadata=genome_metadata,
+        k=window_size,
+        max_workers=threads,
+        output_file=intermediate_file
+    )
+    click.echo(f"K-mer comparison results saved to {intermediate_file}")
+
+    comparison_df = read_kmer_results(intermediate_file)
+    processed_df = process_comparison_results(comparison_df, processed_file)
+    return process_and_merge_results(processed_df)
+
 logger = get_logger(__name__)
 @click.group()
 def cli():
@@ -95,20 +127,22 @@ def run_alignments_cmd(grouped_variants: str, ref: str, out: str, threads: int):
               help='Path to the FASTA file containing grouped variants.')
 @click.option('--out', required=True, type=click.Path(file_okay=False, dir_okay=True), 
               help='Output directory for final results')
-@click.option('--threads', type=int, default=None, help='Maximum number of worker processes (default: CPU count - 1)')
-def process_kmers(alignments: str, window_size: int, grouped_variants: str, out: str, threads: int):
+@click.option('--threads', type=int, default=None, help='Maximum number of worker processes (default: CPU count)')
+@click.option('--emit-intermediates', is_flag=True, default=False,
+              help='Also write intermediate comparison results (Parquet) to the output directory')
+def process_kmers(alignments: str, window_size: int, grouped_variants: str, out: str, threads: int,
+                  emit_intermediates: bool):
     """
     Process K-mer windows, including:
     1. Parse genome FASTA metadata
-    2. Process alignment results to generate K-mer comparison results
-    3. Merge adjacent k-mer windows and output results
+    2. Compare K-mer windows of the alignment results and merge adjacent windows
+       in memory, writing only the final results
     """
     try:
         # Ensure output directory exists
         os.makedirs(out, exist_ok=True)
 
         # Define output file paths
-        intermediate_csv = os.path.join(out, "comparison_results.csv")
         final_csv = os.path.join(out, "output_final_results.csv")
 
         # Step 1: Parse genome FASTA metadata
@@ -116,20 +150,10 @@ def process_kmers(alignments: str, window_size: int, grouped_variants: str, out:
         genome_metadata = parse_fasta_with_metadata(grouped_variants)
         click.echo("Genome FASTA metadata parsing completed")
 
-        # Step 2: Process alignment results
-        click.echo(f"Step 2: Processing FASTA files with window size {window_size}")
-        results = process_fasta_files(
-            alignments, 
-            genome_metadata=genome_metadata, 
-            k=window_size, 
-            max_workers=threads
-        )
-        save_kmer_results_to_csv(results, intermediate_csv)
-        click.echo(f"K-mer comparison results saved to {intermediate_csv}")
-
-        # Step 3: Process and merge results
-        click.echo("Step 3: Merging adjacent k-mer windows")
-        process_and_merge_results(intermediate_csv, final_csv)
+        # Step 2: Compare and merge k-mer windows
+        click.echo(f"Step 2: Processing FASTA files with window size {window_size} and merging adjacent k-mer windows")
+        final_df = run_kmer_stage(alignments, genome_metadata, window_size, threads, out, emit_intermediates)
+        final_df.to_csv(final_csv, index=False)
         click.echo(f"Final results saved to {final_csv}")
 
         click.echo("K-mer processing completed!")
@@ -179,7 +203,9 @@ def convert_to_plink_cmd(csv_file: str, vcf_file: str, output_dir: str):
 @click.option('--out', required=True, help='Output directory')
 @click.option('--window-size', default=4, type=int, help='K-mer window size (default: 4)')
 @click.option('--threads', default=1, type=int, help='Number of threads')
-def run_all(vcf: str, ref: str, out: str, window_size: int, threads: int):
+@click.option('--emit-intermediates', is_flag=True, default=False,
+              help='Also write intermediate k-mer comparison results (Parquet) to the output directory')
+def run_all(vcf: str, ref: str, out: str, window_size: int, threads: int, emit_intermediates: bool):
     """Run the complete pipeline."""
     try:
         check_tools("muscle")
@@ -204,22 +230,13 @@ def run_all(vcf: str, ref: str, out: str, window_size: int, threads: int):
 
         click.echo("Step 3: Processing K-mers...")
         alignments_dir = os.path.join(out, "alignment_results")
-        intermediate_csv = os.path.join(out, "comparison_results.csv")
-        processed_csv = os.path.join(out, "processed_comparison_results.csv")
         final_csv = os.path.join(out, "output_final_results.csv")
         
         # 获取genome metadata
         genome_metadata = parse_fasta_with_metadata(fasta_path)
         
-        results = process_fasta_files(
-            alignments_dir, 
-            genome_metadata=genome_metadata,
-            k=window_size, 
-            max_workers=threads
-        )
-        save_kmer_results_to_csv(results, intermediate_csv)
-        process_comparison_results(intermediate_csv, processed_csv)
-        process_and_merge_results(processed_csv, final_csv)
+        final_df = run_kmer_stage(alignments_dir, genome_metadata, window_size, threads, out, emit_intermediates)
+        final_df.to_csv(final_csv, index=False)
         click.echo(f"K-mer processing completed. Results saved in {final_csv}")
 
         click.echo("Step 4: Converting to VCF format...")
@@ -6,6 +6,7 @@ import subprocess
 import pysam
 from typing import Dict, NamedTuple
 from ..config import Config  # Ensure this module contains the Config class
+from ..utils.file_utils import parse_list_field
 
 class PlinkFiles(NamedTuple):
     bed: str
@@ -64,7 +65,7 @@ def process_comparison_column(csv_data: pd.DataFrame) -> pd.DataFrame:
     def process_diff_array(s):
         try:
             cleaned_s = re.sub(r',\s*$', '', s)
-            return eval(cleaned_s)
+            return parse_list_field(cleaned_s)
         except Exception as e:
             print(f"Error processing diff_array data: {s}. Error: {e}")
             return None
@@ -134,8 +135,8 @@ def create_ped_and_map_files(csv_data: pd.DataFrame, vcf_file: str, output_prefi
             group = row['chromosome_group'].split('_')[-1]
             
             
-            meta_array = eval(row['meta_array'])
-            diff_array = eval(row['diff_array'])
+            meta_array = parse_list_field(row['meta_array'])
+            diff_array = parse_list_field(row['diff_array'])
             
             
             for i, (meta, diff) in enumerate(zip(meta_array, diff_array)):
@@ -224,8 +225,8 @@ def create_vcf_file(csv_data: pd.DataFrame, vcf_file: str, grouped_variants: str
                 #print(f"Group {group_name} missing required columns")
                 continue
                 
-            meta_array = eval(group_data.iloc[0]['meta_array'])
-            diff_array_matrix = [eval(row['diff_array']) for _, row in group_data.iterrows()]
+            meta_array = parse_list_field(group_data.iloc[0]['meta_array'])
+            diff_array_matrix = [parse_list_field(d) for d in group_data['diff_array']]
             
             # Get variant information
             variants_info = get_variants_info(grouped_variants, group_name)
@@ -1,7 +1,8 @@
 """K-mer window generation and comparison functionality."""
 
 from .window_generator import (
-process_fasta_files, process_chromosome_groups, process_and_merge_results, read_fasta_files
+process_fasta_files, process_chromosome_groups, process_and_merge_results, read_fasta_files,
+compare_sequences, merge_kmer_results, run_kmer_pipeline, kmer_window, process_sequences
 )
 from .comparison import (
     process_comparison_results,
@@ -10,10 +11,12 @@ from .comparison import (
 __all__ = [
     'kmer_window',
     'process_sequences',
-    'compare_windows',
+    'compare_sequences',
     'process_fasta_files',
-    'process_comparison_results'
+    'process_comparison_results',
     'process_chromosome_groups',
     'process_and_merge_results',
-    'read_fasta_files'
+    'read_fasta_files',
+    'merge_kmer_results',
+    'run_kmer_pipeline'
 ]
\ No newline at end of file
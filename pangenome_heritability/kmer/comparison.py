@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Union
 import pandas as pd
 import numpy as np
 import os
@@ -7,12 +7,22 @@ from ..utils.logging_utils import get_logger
 
 logger = get_logger(__name__)
 
-from .window_generator import kmer_window
+from .window_generator import kmer_window, read_kmer_results, save_kmer_results_to_parquet
 
-def process_comparison_results(input_file: str, output_file: str):
-    """Post-process comparison results for empty sequences."""
+def process_comparison_results(
+    input_file: Union[str, pd.DataFrame],
+    output_file: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Post-process comparison results for empty sequences.
+    input_file may be a path or an in-memory DataFrame; the result is
+    returned and only written out if output_file is given.
+    """
     try:
-        df = pd.read_csv(input_file)
+        if isinstance(input_file, pd.DataFrame):
+            df = input_file.copy()
+        else:
+            df = read_kmer_results(input_file)
 
         
         mask = df['chromosome_group'].str.contains('_input.fasta', na=False)
@@ -20,8 +30,13 @@ def process_comparison_results(input_file: str, output_file: str):
         df.loc[mask, 'matches_ref'] = 0  
 
         
-        df.to_csv(output_file, index=False)
-        logger.info(f"Processed comparison results saved to {output_file}")
+        if output_file:
+            if output_file.endswith('.csv'):
+                df.to_csv(output_file, index=False)
+                logger.info(f"Processed comparison results saved to {output_file}")
+            else:
+                save_kmer_results_to_parquet(df, output_file)
+        return df
     except Exception as e:
         logger.error(f"Error processing comparison results: {str(e)}")
         raise
@@ -1,19 +1,86 @@
 import os
-import glob
 import re
+import fnmatch
+import tempfile
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 from tqdm import tqdm
+from Bio.SeqIO.FastaIO import SimpleFastaParser
 from pathlib import Path
-from concurrent.futures import ProcessPoolExecutor, as_completed
-from typing import List, Dict, Tuple, Optional
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import List, Dict, Tuple, Optional, Union, Iterator
 from dataclasses import dataclass
-from collections import defaultdict
+from numpy.lib.stride_tricks import sliding_window_view
+from contextlib import nullcontext
 
 
+from ..utils.file_utils import parse_list_field
 from ..utils.logging_utils import get_logger
 logger = get_logger(__name__)
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to the NumPy kernel below
+    njit = None
+
+
+KMER_RESULT_COLUMNS = ['chromosome_group', 'sequence_id', 'diff_array', 'meta_array']
+
+# Intermediate k-mer results are stored as Parquet with typed list columns,
+# so readers get arrays back without re-parsing stringified Python lists.
+KMER_RESULT_SCHEMA = pa.schema([
+    ('chromosome_group', pa.string()),
+    ('sequence_id', pa.string()),
+    ('diff_array', pa.list_(pa.int8())),
+    ('meta_array', pa.list_(pa.struct([
+        ('pos', pa.int64()),
+        ('ref', pa.string()),
+        ('alt', pa.string()),
+    ]))),
+])
+PARQUET_BATCH_ROWS = 10000
+# Packed diff arrays larger than this are backed by a temporary memory-mapped file
+DIFF_MEMMAP_BYTES = 1 << 30
+
+
+def read_kmer_results(path: str) -> pd.DataFrame:
+    """Read intermediate k-mer results (Parquet, or a legacy CSV by suffix)."""
+    if str(path).endswith('.csv'):
+        return pd.read_csv(path)
+    return pd.read_parquet(path)
+
+
+_EMPTY_DIFF = np.zeros(0, dtype=np.int8)
+
+
+def _as_diff_array(value) -> np.ndarray:
+    """Return a diff_array cell as an int8 array, whether read from CSV or Parquet."""
+    if isinstance(value, str):
+        value = parse_list_field(value)
+    return np.asarray(value, dtype=np.int8)
+
+
+def _diff_length(value) -> int:
+    """Number of values in a diff_array cell, counted without parsing CSV strings."""
+    if isinstance(value, str):
+        value = value.strip()
+        return 0 if value in ('', '[]') else value.count(',') + 1
+    try:
+        return len(value)
+    except TypeError:
+        return 0
+
+
+def _as_list(value) -> list:
+    """Return a diff_array/meta_array cell as a plain list, whether read from CSV or Parquet."""
+    if isinstance(value, str):
+        return parse_list_field(value)
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return value if isinstance(value, list) else list(value)
+
 
 def parse_fasta_with_metadata(file_path: str):
     """
@@ -111,45 +178,54 @@ def parse_variant_header(header: str):
     start = int(match.group(3))
     end = int(match.group(4))
     return chrom, grp, start, end
-def read_fasta_files(directory: str) -> Dict[str, List[Tuple[str, str]]]:
-    """Read aligned FASTA files and handle missing/empty files."""
-    pattern = os.path.join(directory, 'Group_*_*_aligned.fasta')
-    file_paths = glob.glob(pattern)
-    file_paths.sort()
-    logger.info(f"Found {len(file_paths)} files matching the pattern.")
+def iter_aligned_fasta(directory: str) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (file name, path) for every Group_*_*_aligned.fasta file in directory,
+    in directory order, without materialising or sorting the listing.
+    """
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if fnmatch.fnmatch(entry.name, 'Group_*_*_aligned.fasta') and entry.is_file():
+                yield entry.name, entry.path
+
+
+def read_aligned_fasta(file_path: str) -> List[Tuple[str, str]]:
+    """Read one aligned FASTA file; an empty file yields a blank seq0/seq1 pair."""
+    with open(file_path) as handle:
+        sequences = [
+            (title.strip(), sequence)
+            for title, sequence in SimpleFastaParser(handle)
+            if title.strip() and sequence
+        ]
     
+    # blank file
+    if not sequences:
+        logger.warning(f"Empty aligned file detected: {file_path}")
+        return [('seq0', ''), ('seq1', '')]
+    return sequences
+
+
+def _read_one(file_name: str, file_path: str) -> Tuple[str, Optional[List[Tuple[str, str]]]]:
+    """read_aligned_fasta for a thread pool; logs and returns None on failure."""
+    try:
+        return file_name, read_aligned_fasta(file_path)
+    except Exception as e:
+        logger.error(f"Error processing file {file_path}: {str(e)}")
+        return file_name, None
+
+
+def read_fasta_files(directory: str, max_workers: Optional[int] = None) -> Dict[str, List[Tuple[str, str]]]:
+    """Read aligned FASTA files on a thread pool and handle missing/empty files."""
     fasta_contents = {}
     
-    for file_path in file_paths:
-        try:
-            sequences = []
-            with open(file_path, 'r') as file:
-                current_seq = []
-                seq_id = ''
-                
-                for line in file:
-                    line = line.strip()
-                    if line.startswith('>'):
-                        if seq_id and current_seq:
-                            sequences.append((seq_id, ''.join(current_seq)))
-                        seq_id = line[1:]
-                        current_seq = []
-                    else:
-                        current_seq.append(line)
-                
-                if seq_id and current_seq:
-                    sequences.append((seq_id, ''.join(current_seq)))
-            
-            # blank file
-            if not sequences:
-                logger.warning(f"Empty aligned file detected: {file_path}")
-                fasta_contents[os.path.basename(file_path)] = [('seq0', ''), ('seq1', '')]
-            else:
-                fasta_contents[os.path.basename(file_path)] = sequences
-        
-        except Exception as e:
-            logger.error(f"Error processing file {file_path}: {str(e)}")
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+        futures = [pool.submit(_read_one, file_name, file_path) for file_name, file_path in iter_aligned_fasta(directory)]
+        for future in futures:
+            file_name, sequences = future.result()
+            if sequences is not None:
+                fasta_contents[file_name] = sequences
     
+    logger.info(f"Read {len(fasta_contents)} aligned FASTA files from {directory}")
     return fasta_contents
 
 
@@ -216,14 +292,153 @@ def kmer_window(sequence: str, k: int = 4) -> List[str]:
     return [sequence[i:i + k] for i in range(len(sequence) - k + 1)]
 
 
-def compare_windows(ref_windows, var_windows):
+# 4-bit IUPAC bitmask codes ('-'=0, A=1, C=2, G=4, T=8, ..., N=15) so a k-mer
+# of up to 16 bases packs into one uint64. 0xFF marks bytes without a code.
+_NUCLEOTIDE_CODES = np.full(256, 0xFF, dtype=np.uint8)
+for _code, _base in enumerate('-ACMGRSVTWYHKDBN'):
+    _NUCLEOTIDE_CODES[ord(_base)] = _code
+_PACKED_MAX_K = 16
+
+
+def _compare_kmers_numpy(ref: np.ndarray, var: np.ndarray, k: int) -> np.ndarray:
+    """
+    NumPy version of _compare_kmers: OR-reduce the per-base mismatch mask
+    over a sliding window of width k.
+    """
+    return sliding_window_view(ref != var, k).any(axis=1).astype(np.int8)
+
+
+if njit is not None:
+    @njit(cache=True, nogil=True, fastmath=True)
+    def _compare_kmers(ref, var, k):
+        """
+        Walk two equal-length uint8 arrays once, keeping a rolling count of
+        mismatching bases inside the current k-mer window.
+        Emits 1 for every window that contains at least one mismatch.
+        """
+        n = ref.shape[0] - k + 1
+        out = np.zeros(n, dtype=np.int8)
+        mismatches = 0
+        for j in range(k - 1):
+            if ref[j] != var[j]:
+                mismatches += 1
+        for i in range(n):
+            if ref[i + k - 1] != var[i + k - 1]:
+                mismatches += 1
+            if i > 0 and ref[i - 1] != var[i - 1]:
+                mismatches -= 1
+            out[i] = 1 if mismatches else 0
+        return out
+
+    @njit(cache=True, nogil=True, fastmath=True)
+    def _compare_kmers_packed(ref, var, k, codes, mask):
+        """
+        Roll each k-mer into a uint64 (4 bits per base, k <= 16) and compare
+        reference and variant k-mers with a single XOR.
+        Returns (out, ok); ok is False if a base has no 4-bit code.
+        """
+        n = ref.shape[0] - k + 1
+        out = np.zeros(n, dtype=np.int8)
+        shift = np.uint64(4)
+        ref_word = np.uint64(0)
+        var_word = np.uint64(0)
+        for i in range(ref.shape[0]):
+            ref_code = codes[ref[i]]
+            var_code = codes[var[i]]
+            if ref_code == 0xFF or var_code == 0xFF:
+                return out, False
+            ref_word = ((ref_word << shift) | np.uint64(ref_code)) & mask
+            var_word = ((var_word << shift) | np.uint64(var_code)) & mask
+            if i >= k - 1:
+                out[i - k + 1] = 1 if (ref_word ^ var_word) != 0 else 0
+        return out, True
+
+    @njit(cache=True, nogil=True, fastmath=True)
+    def _compare_kmers_batch(ref, var_stack, k, codes, mask):
+        """
+        Compare every row of a (V, L) variant stack against one reference in a
+        single call, using _compare_kmers_packed for k <= 16 and _compare_kmers
+        otherwise (or when a row falls outside the IUPAC alphabet).
+        Returns a (V, L - k + 1) int8 array.
+        """
+        num_variants = var_stack.shape[0]
+        out = np.zeros((num_variants, var_stack.shape[1] - k + 1), dtype=np.int8)
+        for v in range(num_variants):
+            if k <= _PACKED_MAX_K:
+                row, packed = _compare_kmers_packed(ref, var_stack[v], k, codes, mask)
+                if packed:
+                    out[v] = row
+                    continue
+            out[v] = _compare_kmers(ref, var_stack[v], k)
+        return out
+else:
+    _compare_kmers = _compare_kmers_numpy
+    _compare_kmers_packed = None
+    _compare_kmers_batch = None
+
+
+def _encode(sequence: str) -> np.ndarray:
+    """View an aligned sequence as a uint8 byte array."""
+    return np.frombuffer(sequence.encode('ascii'), dtype=np.uint8)
+
+
+def _compare_encoded(ref: np.ndarray, var: np.ndarray, k: int) -> np.ndarray:
     """
-    Original compare_windows function.
-    If compare_kmers_with_meta is used, this function may no longer be needed.
+    Compare two encoded sequences, using the packed 4-bit kernel for k <= 16
+    and the byte kernel otherwise (or when a base falls outside the IUPAC alphabet).
     """
-    if len(ref_windows) != len(var_windows):
-        raise ValueError("Reference and variant windows must have the same length.")
-    return [0 if ref == var else 1 for ref, var in zip(ref_windows, var_windows)]
+    if _compare_kmers_packed is not None and k <= _PACKED_MAX_K:
+        mask = np.uint64((1 << (4 * k)) - 1)
+        out, packed = _compare_kmers_packed(ref, var, k, _NUCLEOTIDE_CODES, mask)
+        if packed:
+            return out
+    return _compare_kmers(ref, var, k)
+
+
+def _compare_kmers_batch_numpy(ref: np.ndarray, var_stack: np.ndarray, k: int) -> np.ndarray:
+    """
+    NumPy version of _compare_kmers_batch: broadcast the reference against the
+    (V, L) stack and OR-reduce each row's mismatch mask over width-k windows.
+    """
+    diff = var_stack != ref[None, :]
+    return sliding_window_view(diff, k, axis=1).any(axis=2).astype(np.int8)
+
+
+def _compare_encoded_batch(ref: np.ndarray, var_stack: np.ndarray, k: int) -> np.ndarray:
+    """_compare_encoded for every row of a (V, L) variant stack at once."""
+    if _compare_kmers_batch is None:
+        return _compare_kmers_batch_numpy(ref, var_stack, k)
+    mask = np.uint64((1 << (4 * min(k, _PACKED_MAX_K))) - 1)
+    return _compare_kmers_batch(ref, var_stack, k, _NUCLEOTIDE_CODES, mask)
+
+
+def compare_sequences(ref_seq: str, var_seq: str, k: int = 4) -> List[int]:
+    """
+    Compare two aligned sequences k-mer by k-mer without building k-mer strings.
+
+    Two k-mers at position i are equal iff all k bytes match; the sequences
+    are compared as packed 4-bit codes or byte arrays by the Numba kernels
+    when available.
+
+    Args:
+        ref_seq: Aligned reference sequence
+        var_seq: Aligned variant sequence (same length as ref_seq)
+        k: k-mer window size
+
+    Returns:
+        List[int]: 0/1 per window (1 = k-mer differs), length len(ref_seq) - k + 1
+    """
+    if len(ref_seq) != len(var_seq):
+        raise ValueError("Reference and variant sequences must have the same length.")
+    if len(ref_seq) < k:
+        return []
+
+    return _compare_encoded(_encode(ref_seq), _encode(var_seq), k).tolist()
+
+
+def _group_name(file_name: str) -> str:
+    """Group name of an aligned FASTA file, e.g. Group_2_1_aligned.fasta -> Group_2_1."""
+    return file_name.replace('_aligned.fasta', '').replace('_input.fasta', '')
 
 
 def process_sequences(file_name: str, sequences: List[Tuple[str, str]], genome_metadata: dict, k: int = 4) -> Dict:
@@ -241,7 +456,7 @@ def process_sequences(file_name: str, sequences: List[Tuple[str, str]], genome_m
     """
     try:
        
-        group_name = file_name.replace('_aligned.fasta', '').replace('_input.fasta', '')
+        group_name = _group_name(file_name)
         
        
         if len(sequences) == 2 and sequences[0][0] == 'seq0' and sequences[1][0] == 'seq1':
@@ -257,23 +472,14 @@ def process_sequences(file_name: str, sequences: List[Tuple[str, str]], genome_m
                 start_pos = group_metadata["variants"][0]["start"]
             
             
-            diff_array = []
-            meta_array = []
-            
-            
-            for i in range(len(ref_seq) - k + 1):
-                ref_kmer = ref_seq[i:i+k]
-                var_kmer = var_seq[i:i+k]
-                
-                
-                diff_array.append(1)
-                
-                
-                meta_array.append({
-                    'pos': start_pos + i,
-                    'ref': ref_kmer,  
-                    'alt': var_kmer  
-                })
+            # Every window of a lone variant is reported as different, so only the
+            # k-mer slices vary per position
+            num_windows = max(len(ref_seq) - k + 1, 0)
+            diff_array = [1] * num_windows
+            meta_array = [
+                {'pos': start_pos + i, 'ref': ref_seq[i:i + k], 'alt': var_seq[i:i + k]}
+                for i in range(num_windows)
+            ]
             
             return {
                 'file_name': file_name,
@@ -309,20 +515,28 @@ def process_sequences(file_name: str, sequences: List[Tuple[str, str]], genome_m
         
         start_pos = group_metadata["variants"][0]["start"] if group_metadata["variants"] else 0
         
-       
-        ref_windows = kmer_window_meta(reference_seq, k, start_pos)
+        # Encode the reference and slice its k-mers once for all variants
+        ref_bytes = _encode(reference_seq)
+        ref_kmers = [reference_seq[i:i + k] for i in range(len(reference_seq) - k + 1)]
+        variants = [(seq_id, sequence) for seq_id, sequence in sequences if seq_id != reference_id]
+        if any(len(sequence) != len(reference_seq) for _, sequence in variants):
+            raise ValueError("Reference and variant sequences must have the same length.")
         
-       
-        for seq_id, sequence in sequences:
-            if seq_id == reference_id:
-                continue  
-                
-            
-            var_windows = kmer_window_meta(sequence, k, start_pos)
-            
-            
-            diff_array, meta_array = compare_kmers_with_meta(ref_windows, var_windows)
-            
+        # Stack all variants into one (V, L) array and compare them in a single call
+        if ref_kmers and variants:
+            var_stack = _encode(''.join(sequence for _, sequence in variants)).reshape(len(variants), len(reference_seq))
+            diff_matrix = _compare_encoded_batch(ref_bytes, var_stack, k).tolist()
+        
+        for v, (seq_id, sequence) in enumerate(variants):
+            if not ref_kmers:
+                logger.warning("Input windows are empty")
+                diff_array, meta_array = [0], [{'pos': 0, 'ref': '', 'alt': ''}]
+            else:
+                diff_array = diff_matrix[v]
+                meta_array = [
+                    {'pos': start_pos + i, 'ref': ref_kmer, 'alt': sequence[i:i + k]}
+                    for i, ref_kmer in enumerate(ref_kmers)
+                ]
             
             results.append({
                 'chromosome_group': group_name,
@@ -342,6 +556,19 @@ def process_sequences(file_name: str, sequences: List[Tuple[str, str]], genome_m
         return {'file_name': file_name, 'results': [], 'error': str(e)}
 
 
+def _process_file(file_name: str, file_path: str, group_metadata: Optional[dict], k: int) -> Dict:
+    """
+    Read one aligned FASTA file and compare its sequences (see process_sequences).
+    Only this file's group metadata is passed in, so a task pickles one entry
+    rather than the whole genome_metadata dict.
+    """
+    _, sequences = _read_one(file_name, file_path)
+    if sequences is None:
+        return {'file_name': file_name, 'results': [], 'error': f"Could not read {file_path}"}
+    metadata = {} if group_metadata is None else {_group_name(file_name): group_metadata}
+    return process_sequences(file_name, sequences, metadata, k)
+
+
 def process_fasta_files(
     directory: str,
     genome_metadata: dict,  # Add genome_metadata parameter
@@ -352,33 +579,60 @@ def process_fasta_files(
 ) -> Dict:
     """
     Process FASTA files and generate comparison results, integrating genome metadata.
+    If output_file is given, results are written to it (Parquet) as they complete and
+    'processed' in the returned dict is left empty.
     """
     try:
         if max_workers is None:
-            max_workers = 10
+            max_workers = os.cpu_count() or 1
         
         logger.info(f"Starting FASTA processing with {max_workers} workers")
-        fasta_contents = read_fasta_files(directory)
         results = []
         errors = []
+        written = 0
+        
+        # Compile the kernels once up front; forked workers inherit them
+        _prime_kernels()
         
-        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # With an output file, rows are streamed to Parquet in batches as files
+        # complete instead of being held in memory until the end.
+        with pq.ParquetWriter(output_file, KMER_RESULT_SCHEMA) if output_file else nullcontext() as writer, \
+                ProcessPoolExecutor(max_workers=max_workers) as executor:
+            pending = []
+            
+            # Each task reads and compares one file in a worker process: building the
+            # per-window meta dicts is pure Python and holds the GIL, so threads would
+            # serialise it
             futures = {
-                executor.submit(process_sequences, file_name, sequences, genome_metadata, k): file_name
-                for file_name, sequences in fasta_contents.items()
+                executor.submit(
+                    _process_file, file_name, file_path, genome_metadata.get(_group_name(file_name)), k
+                ): file_name
+                for file_name, file_path in iter_aligned_fasta(directory)
             }
             
             for future in tqdm(as_completed(futures), total=len(futures), desc="Processing files", bar_format="{desc}: {n_fmt}/{total_fmt} groups"):
                 result = future.result()
+                # Drop the finished future so its rows can be freed once written
+                futures.pop(future)
                 if result['error']:
                     errors.append(f"Error in {result['file_name']}: {result['error']}")
-                if result['results']:
+                if not result['results']:
+                    continue
+                if writer is None:
                     results.extend(result['results'])
+                    continue
+                pending.extend(result['results'])
+                if len(pending) >= PARQUET_BATCH_ROWS:
+                    writer.write_table(pa.Table.from_pylist(pending, schema=KMER_RESULT_SCHEMA))
+                    written += len(pending)
+                    pending = []
+            
+            if writer is not None and pending:
+                writer.write_table(pa.Table.from_pylist(pending, schema=KMER_RESULT_SCHEMA))
+                written += len(pending)
         
         if output_file:
-            df = pd.DataFrame(results)
-            df.to_csv(output_file, index=False)
-            logger.info(f"Initial results saved to: {output_file}")
+            logger.info(f"Initial results ({written} rows) saved to: {output_file}")
         
         if error_log and errors:
             with open(error_log, 'w') as f:
@@ -392,6 +646,60 @@ def process_fasta_files(
         logger.error(f"Error in process_fasta_files: {str(e)}")
         raise
 
+def _changed_columns_mask(matrix: np.ndarray) -> np.ndarray:
+    """
+    Boolean mask over the columns of a (rows x cols) diff matrix: True for the
+    first column and for every column that differs from its left neighbour in
+    at least one row.
+    """
+    mask = np.ones(matrix.shape[1], dtype=bool)
+    mask[1:] = np.any(matrix[:, 1:] != matrix[:, :-1], axis=0)
+    return mask
+
+
+def _changed_columns_masks_numpy(
+    values: np.ndarray,
+    value_offsets: np.ndarray,
+    num_rows: np.ndarray,
+    num_cols: np.ndarray
+) -> np.ndarray:
+    """NumPy version of _changed_columns_masks, one group at a time."""
+    masks = [
+        _changed_columns_mask(values[start:start + rows * cols].reshape(rows, cols))
+        for start, rows, cols in zip(value_offsets, num_rows, num_cols)
+    ]
+    return np.concatenate(masks) if masks else np.zeros(0, dtype=bool)
+
+
+if njit is not None:
+    @njit(cache=True, nogil=True, fastmath=True)
+    def _changed_columns_masks(values, value_offsets, num_rows, num_cols):
+        """
+        _changed_columns_mask for many groups at once. Group g's diff matrix is
+        the row-major (num_rows[g] x num_cols[g]) block of values starting at
+        value_offsets[g]. Returns the masks of all groups concatenated.
+        """
+        n_groups = num_cols.shape[0]
+        mask_offsets = np.zeros(n_groups + 1, dtype=np.int64)
+        for g in range(n_groups):
+            mask_offsets[g + 1] = mask_offsets[g] + num_cols[g]
+        masks = np.zeros(mask_offsets[n_groups], dtype=np.bool_)
+        for g in range(n_groups):
+            cols = num_cols[g]
+            if cols == 0:
+                continue
+            out = mask_offsets[g]
+            masks[out] = True
+            for r in range(num_rows[g]):
+                row = value_offsets[g] + r * cols
+                for c in range(1, cols):
+                    if values[row + c] != values[row + c - 1]:
+                        masks[out + c] = True
+        return masks
+else:
+    _changed_columns_masks = _changed_columns_masks_numpy
+
+
 def retain_changed_columns_group(rows: List[List[int]]) -> List[List[int]]:
     """
     rows: List of lists[int], each row is a diff_array: [0,1,0,1...].
@@ -401,27 +709,8 @@ def retain_changed_columns_group(rows: List[List[int]]) -> List[List[int]]:
     if not rows:
         return []
 
-    num_rows = len(rows)
-    num_cols = len(rows[0])
-
-    # Initialize the result list, keep the first column as is
-    retained = [[row[0]] for row in rows]
-
-    # Compare each column starting from the second one
-    for col in range(1, num_cols):
-        retain = False
-        # Check each row to see if the current column differs from the previous column
-        for row in range(num_rows):
-            if row[col] != row[col - 1]:
-                retain = True
-                break
-
-        # If there is a change, retain this column in all rows
-        if retain:
-            for row_i in range(num_rows):
-                retained[row_i].append(rows[row_i][col])
-
-    return retained
+    matrix = np.asarray(rows, dtype=np.int8)
+    return matrix[:, _changed_columns_mask(matrix)].tolist()
 
 ### <-- NEW OR MODIFIED CODE ###
 def retain_changed_columns_group_with_index(rows: List[List[int]]) -> Tuple[List[List[int]], List[int]]:
@@ -430,112 +719,241 @@ def retain_changed_columns_group_with_index(rows: List[List[int]]) -> Tuple[List
     """
     if not rows:
         return [], []
-    num_rows = len(rows)
-    num_cols = len(rows[0])
-
-    retained = [[] for _ in range(num_rows)]
-    retained_indices = []
-
-    # Retain the first column directly
-    for r in range(num_rows):
-        retained[r].append(rows[r][0])
-    retained_indices.append(0)
-
-    for col in range(1, num_cols):
-        keep = False
-        for row in rows:
-            if row[col] != row[col - 1]:
-                keep = True
-                break
-        if keep:
-            for r in range(num_rows):
-                retained[r].append(rows[r][col])
-            retained_indices.append(col)
 
-    return retained, retained_indices
+    matrix = np.asarray(rows, dtype=np.int8)
+    mask = _changed_columns_mask(matrix)
+    return matrix[:, mask].tolist(), np.flatnonzero(mask).tolist()
+
+
+@dataclass
+class GroupedDiffArrays:
+    """
+    Diff arrays of all rows as one contiguous int8 array, in chromosome_group order.
+    Row i is values[row_offsets[i]:row_offsets[i + 1]]; group g owns rows
+    group_offsets[g]:group_offsets[g + 1]. Rows that were skipped have no values
+    and meta_arrays[i] is None, so each group's valid rows stay contiguous.
+    """
+    group_names: np.ndarray
+    group_offsets: np.ndarray
+    chromosome_groups: np.ndarray
+    sequence_ids: np.ndarray
+    values: np.ndarray
+    row_offsets: np.ndarray
+    meta_arrays: List[Optional[list]]
+
+
+def group_diff_arrays(df: pd.DataFrame) -> GroupedDiffArrays:
+    """
+    Parse the diff_array/meta_array columns once and pack all diff arrays into a
+    preallocated int8 array (memory-mapped to a temporary file above
+    DIFF_MEMMAP_BYTES) instead of keeping per-row Python lists. The buffer is
+    sized from the cells before any row is parsed, and each row is parsed
+    directly into its slice.
+    """
+    # Hash group names to integer codes (only the unique names get sorted), then order
+    # rows by code; rows without a group name (code -1) are dropped, as groupby would
+    chromosome_groups = df['chromosome_group'].to_numpy()
+    group_codes, group_names = pd.factorize(chromosome_groups, sort=True)
+    order = np.flatnonzero(group_codes >= 0)
+    order = order[np.argsort(group_codes[order], kind='stable')]
+    group_offsets = np.concatenate(([0], np.cumsum(np.bincount(group_codes[order], minlength=len(group_names)))))
+    
+    chromosome_groups = chromosome_groups[order]
+    sequence_ids = df['sequence_id'].to_numpy()[order]
+    diff_values = df['diff_array'].to_numpy()[order]
+    meta_values = df['meta_array'].to_numpy()[order]
+    
+    # First pass: size the buffer from the cells themselves, without parsing them
+    capacity = int(sum(_diff_length(value) for value in diff_values))
+    if capacity > DIFF_MEMMAP_BYTES:
+        logger.info(f"Memory-mapping {capacity} diff values to a temporary file")
+        values = np.memmap(tempfile.TemporaryFile(), dtype=np.int8, mode='w+', shape=(capacity,))
+    else:
+        values = np.empty(capacity, dtype=np.int8)
+    
+    # Second pass: parse each row straight into its slice; skipped rows take no space
+    row_offsets = np.zeros(len(order) + 1, dtype=np.int64)
+    meta_arrays = []
+    end = 0
+    for i, (chrom, seq_id, diff_value, meta_value) in enumerate(
+        zip(chromosome_groups, sequence_ids, diff_values, meta_values)
+    ):
+        meta_array = None
+        try:
+            diff_array = _as_diff_array(diff_value)
+            meta_array = _as_list(meta_value)
+            if len(diff_array) == 0 or not meta_array:
+                logger.warning(f"Skipping empty arrays: chromosome_group={chrom}, sequence_id={seq_id}")
+                meta_array = None
+            elif end + len(diff_array) > capacity:
+                raise ValueError("diff_array is longer than its cell suggests")
+            else:
+                values[end:end + len(diff_array)] = diff_array
+                end += len(diff_array)
+        except Exception as e:
+            logger.warning(f"Error processing row data: {str(e)}, skipping this row. chromosome_group={chrom}, sequence_id={seq_id}")
+            meta_array = None
+        row_offsets[i + 1] = end
+        meta_arrays.append(meta_array)
+    
+    return GroupedDiffArrays(
+        group_names=group_names,
+        group_offsets=group_offsets,
+        chromosome_groups=chromosome_groups,
+        sequence_ids=sequence_ids,
+        values=values[:end],
+        row_offsets=row_offsets,
+        meta_arrays=meta_arrays
+    )
+
+
+def merge_kmer_results(results: Union[List[Dict], pd.DataFrame]) -> pd.DataFrame:
+    """
+    Merge adjacent k-mer windows for each chromosome_group in memory,
+    removing '-' characters in the final results.
+    
+    All diff arrays are packed into one int8 array (see group_diff_arrays);
+    each group's diff matrix is then a contiguous (rows x windows) slice of it.
+    
+    Args:
+        results: Per-sequence comparison results (chromosome_group, sequence_id,
+            diff_array, meta_array), as records (e.g. process_fasta_files(...)['processed'])
+            or as a DataFrame read from an intermediate file
+    
+    Returns:
+        pd.DataFrame: Merged results, one row per sequence
+    """
+    df = results if isinstance(results, pd.DataFrame) else pd.DataFrame(results, columns=KMER_RESULT_COLUMNS)
+    if df.empty:
+        return pd.DataFrame(columns=KMER_RESULT_COLUMNS)
+    
+    grouped = group_diff_arrays(df)
+    group_names = grouped.group_names
+    group_bounds = grouped.group_offsets
+    sequence_ids = grouped.sequence_ids
+    meta_arrays = grouped.meta_arrays
+    values = grouped.values
+    row_offsets = grouped.row_offsets
+    row_lengths = np.diff(row_offsets)
+    
+    # Valid rows and matrix shape of every group; groups that cannot be merged keep 0 columns
+    n_groups = len(group_names)
+    group_rows = [[] for _ in range(n_groups)]
+    group_num_rows = np.zeros(n_groups, dtype=np.int64)
+    group_num_cols = np.zeros(n_groups, dtype=np.int64)
+    for g, chrom in enumerate(group_names):
+        rows = [i for i in range(group_bounds[g], group_bounds[g + 1]) if meta_arrays[i] is not None]
+        if len(rows) < 1:
+            logger.warning(f"Group {chrom} does not have enough valid data for processing")
+            continue
+        num_cols = row_lengths[rows[0]]
+        if np.any(row_lengths[rows] != num_cols):
+            logger.error(f"Error processing group {chrom}: Diff arrays within the group have different lengths")
+            continue
+        group_rows[g] = rows
+        group_num_rows[g] = len(rows)
+        group_num_cols[g] = num_cols
+    
+    # Changed-column masks for all groups in one pass
+    group_value_offsets = row_offsets[group_bounds[:-1]]
+    masks = _changed_columns_masks(values, group_value_offsets, group_num_rows, group_num_cols)
+    mask_offsets = np.concatenate(([0], np.cumsum(group_num_cols)))
+    
+    merged_results = []
+    
+    for g, chrom in enumerate(group_names):
+        rows = group_rows[g]
+        if not rows:
+            continue
+        try:
+            start = group_value_offsets[g]
+            matrix = values[start:start + group_num_rows[g] * group_num_cols[g]].reshape(len(rows), group_num_cols[g])
+            
+            # Process data using retain_changed_columns_group_with_meta
+            retained_diff, retained_meta = retain_changed_columns_group_with_meta(
+                matrix, [meta_arrays[i] for i in rows],
+                mask=masks[mask_offsets[g]:mask_offsets[g + 1]]
+            )
+            
+            if not retained_diff or not retained_meta or len(retained_diff) != len(rows):
+                logger.warning(f"Invalid processing results for group {chrom}")
+                continue
+            
+            # Process results, removing '-' characters (windows without gaps are kept as is)
+            for i, row in enumerate(rows):
+                processed_meta = [
+                    meta if '-' not in meta['ref'] and '-' not in meta['alt'] else {
+                        'pos': meta['pos'],
+                        'ref': meta['ref'].replace('-', ''),  # Remove '-' in ref
+                        'alt': meta['alt'].replace('-', '')   # Remove '-' in alt
+                    }
+                    for meta in retained_meta[i]
+                ]
+                
+                merged_results.append({
+                    'chromosome_group': chrom,
+                    'sequence_id': sequence_ids[row],
+                    'diff_array': retained_diff[i],
+                    'meta_array': processed_meta
+                })
+        
+        except Exception as e:
+            logger.error(f"Error processing group {chrom}: {str(e)}")
+            continue
+    
+    return pd.DataFrame(merged_results, columns=KMER_RESULT_COLUMNS)
+
+
+def run_kmer_pipeline(
+    directory: str,
+    genome_metadata: dict,
+    k: int = 4,
+    max_workers: Optional[int] = None,
+    error_log: str = None
+) -> pd.DataFrame:
+    """
+    Compare k-mer windows for every aligned FASTA file and merge adjacent windows
+    in a single in-memory pass, without writing intermediate files.
+    
+    Returns:
+        pd.DataFrame: Final merged results (see merge_kmer_results)
+    """
+    results = process_fasta_files(
+        directory,
+        genome_metadata=genome_metadata,
+        k=k,
+        max_workers=max_workers,
+        error_log=error_log
+    )
+    return merge_kmer_results(results['processed'])
 
 
-def process_and_merge_results(input_csv: str, output_csv: str):
+def process_and_merge_results(
+    input_csv: Union[str, pd.DataFrame],
+    output_csv: Optional[str] = None
+) -> pd.DataFrame:
     """
     Process and merge k-mer window results, removing '-' characters in the final results.
+    input_csv may be a path or an in-memory DataFrame; the merged results are
+    returned and only written out if output_csv is given.
     """
     try:
-        # Read CSV file
-        df = pd.read_csv(input_csv)
+        df = input_csv if isinstance(input_csv, pd.DataFrame) else read_kmer_results(input_csv)
         
         if df.empty:
             logger.warning("Input file is empty")
-            return
+            return pd.DataFrame(columns=KMER_RESULT_COLUMNS)
         
-        # Group by chromosome_group
-        grouped = df.groupby('chromosome_group')
+        merged_df = merge_kmer_results(df)
         
-        merged_results = []
-        
-        for chrom, group in grouped:
-            try:
-                diff_arrays = []
-                meta_arrays = []
-                sequence_ids = []
-                
-                for _, row in group.iterrows():
-                    try:
-                        diff_array = eval(row['diff_array']) if isinstance(row['diff_array'], str) else row['diff_array']
-                        meta_array = eval(row['meta_array']) if isinstance(row['meta_array'], str) else row['meta_array']
-                        
-                        if not diff_array or not meta_array:
-                            logger.warning(f"Skipping empty arrays: chromosome_group={chrom}, sequence_id={row['sequence_id']}")
-                            continue
-                            
-                        diff_arrays.append(diff_array)
-                        meta_arrays.append(meta_array)
-                        sequence_ids.append(row['sequence_id'])
-                    except Exception as e:
-                        logger.warning(f"Error processing row data: {str(e)}, skipping this row. chromosome_group={chrom}, sequence_id={row['sequence_id']}")
-                        continue
-                
-                if len(diff_arrays) < 1 or len(meta_arrays) < 1:
-                    logger.warning(f"Group {chrom} does not have enough valid data for processing")
-                    continue
-                
-                # Process data using retain_changed_columns_group_with_meta
-                retained_diff, retained_meta = retain_changed_columns_group_with_meta(diff_arrays, meta_arrays)
-                
-                if not retained_diff or not retained_meta or len(retained_diff) != len(sequence_ids):
-                    logger.warning(f"Invalid processing results for group {chrom}")
-                    continue
-                
-                # Process results, removing '-' characters
-                for i, seq_id in enumerate(sequence_ids):
-                    if i < len(retained_diff) and i < len(retained_meta):
-                        # Process '-' characters in meta_array
-                        processed_meta = []
-                        for meta in retained_meta[i]:
-                            processed_meta.append({
-                                'pos': meta['pos'],
-                                'ref': meta['ref'].replace('-', ''),  # Remove '-' in ref
-                                'alt': meta['alt'].replace('-', '')   # Remove '-' in alt
-                            })
-                        
-                        merged_results.append({
-                            'chromosome_group': chrom,
-                            'sequence_id': seq_id,
-                            'diff_array': retained_diff[i],
-                            'meta_array': processed_meta
-                        })
-            
-            except Exception as e:
-                logger.error(f"Error processing group {chrom}: {str(e)}")
-                continue
-        
-        if not merged_results:
+        if merged_df.empty:
             logger.warning("No valid merged results")
-            return
+            return merged_df
             
-        # Create new DataFrame and save
-        merged_df = pd.DataFrame(merged_results)
-        merged_df.to_csv(output_csv, index=False)
-        logger.info(f"Merged results saved to: {output_csv}")
+        if output_csv:
+            merged_df.to_csv(output_csv, index=False)
+            logger.info(f"Merged results saved to: {output_csv}")
+        return merged_df
         
     except Exception as e:
         logger.error(f"Error during processing: {str(e)}")
@@ -546,27 +964,22 @@ def process_chromosome_groups(input_csv: str, output_csv: str) -> None:
     """
     Process data for each chromosome_group, retaining arrays for all positions.
     """
-    data = defaultdict(list)
+    grouped = group_diff_arrays(read_kmer_results(input_csv))
     
-    # Read CSV file
-    with open(input_csv, newline='', encoding='utf-8') as csvfile:
-        reader = pd.read_csv(csvfile)
-        
-        for _, row in reader.iterrows():
-            chromosome_group = row['chromosome_group']
-            diff_array = eval(row['diff_array']) if isinstance(row['diff_array'], str) else row['diff_array']
-            meta_array = eval(row['meta_array']) if isinstance(row['meta_array'], str) else row['meta_array']
-            
-            # Directly add original data to processed_data
-            processed_data.append({
-                'chromosome_group': chromosome_group,
-                'sequence_id': row['sequence_id'],
-                'diff_array': diff_array,  # Use original diff_array
-                'meta_array': meta_array   # Use original meta_array
-            })
+    processed_data = []
+    for i, meta_array in enumerate(grouped.meta_arrays):
+        if meta_array is None:
+            continue
+        # Directly add original data to processed_data
+        processed_data.append({
+            'chromosome_group': grouped.chromosome_groups[i],
+            'sequence_id': grouped.sequence_ids[i],
+            'diff_array': grouped.values[grouped.row_offsets[i]:grouped.row_offsets[i + 1]].tolist(),
+            'meta_array': meta_array
+        })
     
     # Write processed CSV
-    processed_df = pd.DataFrame(processed_data)
+    processed_df = pd.DataFrame(processed_data, columns=KMER_RESULT_COLUMNS)
     # Convert arrays to strings for storage
     processed_df['diff_array'] = processed_df['diff_array'].apply(str)
     processed_df['meta_array'] = processed_df['meta_array'].apply(str)
@@ -574,6 +987,13 @@ def process_chromosome_groups(input_csv: str, output_csv: str) -> None:
     logger.info(f"Processed results saved to: {output_csv}")
 
 
+def save_kmer_results_to_parquet(results: Union[List[Dict], pd.DataFrame], output_file: str) -> None:
+    """Save kmer comparison results to a Parquet file with typed list columns."""
+    records = results.to_dict('records') if isinstance(results, pd.DataFrame) else results
+    pq.write_table(pa.Table.from_pylist(records, schema=KMER_RESULT_SCHEMA), output_file)
+    logger.info(f"Results saved to: {output_file}")
+
+
 def save_kmer_results_to_csv(results: Dict, output_file: str) -> None:
     """Save kmer comparison results to a CSV file."""
     try:
@@ -600,8 +1020,8 @@ def explode_final_results(input_csv: str, output_csv: str) -> None:
     for _, row in df.iterrows():
         cg = row['chromosome_group']
         seq_id = row['sequence_id']
-        diff_array = eval(row['diff_array']) if isinstance(row['diff_array'], str) else row['diff_array']
-        meta_array = eval(row['meta_array']) if isinstance(row['meta_array'], str) else row['meta_array']
+        diff_array = _as_list(row['diff_array'])
+        meta_array = _as_list(row['meta_array'])
 
         for diff_val, meta in zip(diff_array, meta_array):
             # meta: {'pos':..., 'ref':..., 'alt':...}
@@ -621,64 +1041,71 @@ def explode_final_results(input_csv: str, output_csv: str) -> None:
 
 def retain_changed_columns_group_with_meta(
     rows: List[List[int]], 
-    meta_rows: List[List[Dict]]
+    meta_rows: List[List[Dict]],
+    mask: Optional[np.ndarray] = None
 ) -> Tuple[List[List[int]], List[List[Dict]]]:
     """
     Process difference arrays and metadata arrays, merging identical columns starting from the first column.
     
     Args:
-        rows: List of difference arrays, each row represents the alignment result of a sequence
+        rows: Difference arrays (list of lists or a 2D array), each row represents the alignment result of a sequence
         meta_rows: List of metadata, corresponding to the difference arrays
+        mask: Precomputed changed-columns mask (see _changed_columns_mask), optional
     
     Returns:
         Tuple[List[List[int]], List[List[Dict]]]: (Processed difference arrays, Processed metadata arrays)
     """
-    if not rows or not meta_rows:
+    if len(rows) == 0 or len(meta_rows) == 0:
         return [], []
     
     if len(rows) != len(meta_rows):
         raise ValueError("Mismatch between the lengths of difference arrays and metadata arrays")
 
-    num_rows = len(rows)
-    num_cols = len(rows[0])
+    matrix = np.asarray(rows, dtype=np.int8)
+    if mask is None:
+        mask = _changed_columns_mask(matrix)
+    retained_diff = matrix[:, mask].tolist()
 
-    # Initialize result lists
-    retained_diff = [[rows[i][0]] for i in range(num_rows)]
-    retained_meta = [[meta_rows[i][0]] for i in range(num_rows)]
-    
-    current_col = 0  # Current column index being processed
-    
-    # Compare starting from the second column
-    for col in range(1, num_cols):
-        is_same = True
-        # Check if all rows in the current column are the same as the previous column
-        for row_i in range(num_rows):
-            if rows[row_i][col] != rows[row_i][col-1]:
-                is_same = False
-                break
-        
-        if is_same:
-            # If the current column is the same as the previous column, merge metadata
-            for row_i in range(num_rows):
-                curr_meta = meta_rows[row_i][col]
-                prev_meta = retained_meta[row_i][-1]
-                
-                # Merge metadata, adding new bases
-                merged_meta = {
-                    'pos': prev_meta['pos'],
-                    'ref': prev_meta['ref'] + curr_meta['ref'][-1],
-                    'alt': prev_meta['alt'] + curr_meta['alt'][-1]
-                }
-                retained_meta[row_i][-1] = merged_meta
-        else:
-            # If different, add new column
-            for row_i in range(num_rows):
-                retained_diff[row_i].append(rows[row_i][col])
-                retained_meta[row_i].append(meta_rows[row_i][col])
-            current_col += 1
+    # Each retained column starts a run of identical columns; the metadata of
+    # the run is merged into its first window, adding one base per column.
+    starts = np.flatnonzero(mask).tolist()
+    ends = starts[1:] + [matrix.shape[1]]
+
+    retained_meta = []
+    for meta in meta_rows:
+        merged = []
+        for start, end in zip(starts, ends):
+            first = meta[start]
+            if end - start == 1:
+                merged.append(first)
+                continue
+            merged.append({
+                'pos': first['pos'],
+                'ref': first['ref'] + ''.join(m['ref'][-1] for m in meta[start + 1:end]),
+                'alt': first['alt'] + ''.join(m['alt'][-1] for m in meta[start + 1:end])
+            })
+        retained_meta.append(merged)
 
     return retained_diff, retained_meta
 
+
+def _prime_kernels() -> None:
+    """
+    Call each Numba kernel once on tiny inputs so it is compiled (or loaded from
+    the on-disk cache) before the worker pool starts, rather than in every worker.
+    """
+    if njit is None:
+        return
+    ref, var = _encode('AC'), _encode('AG')
+    _compare_kmers(ref, var, 1)
+    _compare_kmers_packed(ref, var, 1, _NUCLEOTIDE_CODES, np.uint64(0xF))
+    _compare_encoded_batch(ref, var.reshape(1, -1), 1)
+    _changed_columns_masks(
+        np.zeros(2, dtype=np.int8), np.zeros(1, dtype=np.int64),
+        np.ones(1, dtype=np.int64), np.full(1, 2, dtype=np.int64)
+    )
+
+
 # Example usage:
 """
 # Input example:
@@ -3,7 +3,8 @@
 from .file_utils import (
     ensure_directory,
     cleanup_temp_files,
-    get_absolute_path
+    get_absolute_path,
+    parse_list_field
 )
 from .logging_utils import (
     setup_logging,
@@ -14,6 +15,7 @@ __all__ = [
     'ensure_directory',
     'cleanup_temp_files',
     'get_absolute_path',
+    'parse_list_field',
     'setup_logging',
     'get_logger'
 ]
\ No newline at end of file
@@ -1,4 +1,6 @@
 import os
+import ast
+import json
 import shutil
 from pathlib import Path
 from typing import Union, List
@@ -52,6 +54,25 @@ def get_absolute_path(path: Union[str, Path]) -> Path:
     """
     return Path(os.path.expandvars(os.path.expanduser(str(path)))).resolve()
 
+def parse_list_field(value: str) -> list:
+    """
+    Parse a list column (e.g. diff_array, meta_array) stored in CSV as a Python literal.
+    
+    Integer lists such as "[0, 1, 0]" are valid JSON and are parsed with json.loads;
+    anything else (e.g. lists of dicts with quoted keys) falls back to ast.literal_eval.
+    Neither executes code, unlike eval().
+    
+    Args:
+        value: Stringified list
+        
+    Returns:
+        Parsed list
+    """
+    try:
+        return json.loads(value)
+    except ValueError:
+        return ast.literal_eval(value)
+
 # pangenome_heritability/utils/logging_utils.py
 import logging
 import sys
@@ -7,11 +7,15 @@ setup(
     install_requires=[
         "pandas>=1.3.0",
         "numpy>=1.20.0",
+        "pyarrow>=7.0.0",
         "pysam>=0.16.0",
         "biopython>=1.79",
         "click>=8.0.0",
         "tqdm>=4.65.0",
     ],
+    extras_require={
+        "fast": ["numba>=0.53.0"],
+    },
     entry_points={
     'console_scripts': [
         'panherit=pangenome_heritability.cli:cli',